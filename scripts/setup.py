@@ -27,11 +27,11 @@ info_py_file = info_py_files[0]
 # Get the module name by removing the .py extension
 info_module_name = info_py_file.stem
 
-# Add the current script directory to the system path for imports
-sys.path.append(str(current_script_dir))
-
-# Import the info.py module dynamically
-info_module = importlib.import_module(info_module_name)
+# Load the info.py module directly from its file, without searching sys.path
+info_spec = importlib.util.spec_from_file_location(info_module_name, info_py_file)
+info_module = importlib.util.module_from_spec(info_spec)
+sys.modules[info_module_name] = info_module
+info_spec.loader.exec_module(info_module)
 
 """
 STEP 2.
@@ -58,7 +58,8 @@ PROJECT_PATH = Path(PROJECT_ENVIRONMENT_VALUE)
 
 """
 STEP 4.
-Set scripts path and add any sub-directories to sys.path as well.
+Set scripts path and add it to sys.path.
+Its sub-directories are added to sys.path in STEP 6, from the same walk of the project directory used to build the directory tree.
 """
 # Define the scripts path using the project path and the name of the scripts directory
 SCRIPTS_PATH = PROJECT_PATH / SCRIPTS_DIRECTORY_NAME
@@ -66,48 +67,53 @@ SCRIPTS_PATH = PROJECT_PATH / SCRIPTS_DIRECTORY_NAME
 # Add SCRIPTS_PATH to sys.path 
 sys.path.append(str(SCRIPTS_PATH))
 
-# Iterate through all sub-directories of SCRIPTS_PATH and add them to sys.path
-for subdir in SCRIPTS_PATH.rglob('*'):
-    if subdir.is_dir():
-        sys.path.append(str(subdir))
-
 """
 STEP 5.
 Find utilities module for this project.
 We assume the utilities module lies directly under SCRIPTS_PATH.
 We assume it is the only such file whose name contains utls.py as a substring.
+If SCRIPTS_PATH/utils.py exists, it is taken to be the utilities module without scanning the directory.
 """
 
-def matches_pattern_in_order(filename, pattern):
-    # Generate a regex pattern based on the input pattern
+def pattern_in_order_regex(pattern):
+    # Generate a regex matching any string that contains the characters of pattern in order
     regex_pattern = '.*'.join(map(re.escape, pattern))
-    regex = re.compile(f'.*{regex_pattern}.*')
-    return bool(regex.match(filename))
-
-# Find all files in the immediate SCRIPTS_PATH directory
-all_files = SCRIPTS_PATH.glob('*')
-
-# Filter the files to find the 'utls.py' file (assuming it's unique)
-utils_py_files = [file for file in all_files if file.is_file() and matches_pattern_in_order(file.name, 'utls.py')]
-
-# Check if exactly one 'utls.py' file is found
-if len(utils_py_files) != 1:
-    raise FileNotFoundError("Could not uniquely identify the utls.py file")
-
-# Get the path of the 'utls.py' file
-utils_py_file = utils_py_files[0]
+    return re.compile(f'.*{regex_pattern}.*')
+
+# Common case: the utilities module is simply called utils.py, so check for it directly
+utils_py_file = SCRIPTS_PATH / 'utils.py'
+
+if not utils_py_file.is_file():
+    # Otherwise scan the immediate SCRIPTS_PATH directory once for the 'utls.py' file (assuming it's unique),
+    # compiling the regex once and stopping as soon as a second match turns up
+    utils_regex = pattern_in_order_regex('utls.py')
+    utils_py_file = None
+    with os.scandir(SCRIPTS_PATH) as entries:
+        for entry in entries:
+            if entry.is_file() and utils_regex.match(entry.name):
+                if utils_py_file is not None:
+                    raise FileNotFoundError("Could not uniquely identify the utls.py file")
+                utils_py_file = Path(entry.path)
+
+    if utils_py_file is None:
+        raise FileNotFoundError("Could not uniquely identify the utls.py file")
 
 # Get the module name by removing the .py extension and converting to valid module name
 utils_module_name = utils_py_file.stem.replace('-', '_').replace('.', '_')
 
 # utils_module= f'{SCRIPTS_PATH.name}.{utils_module_name}'
 
-# Import the utils.py module dynamically
-utils_module = importlib.import_module(utils_module_name)
+# Load the utils.py module directly from its file, without searching sys.path.
+# Registering it in sys.modules means later 'from utils import ...' statements reuse this module.
+utils_spec = importlib.util.spec_from_file_location(utils_module_name, utils_py_file)
+utils_module = importlib.util.module_from_spec(utils_spec)
+sys.modules[utils_module_name] = utils_module
+utils_spec.loader.exec_module(utils_module)
 
 """
 STEP 6.
-Import certain functions from utils_module and use them to create a directory tree and path dictionary.
+Import certain functions from utils_module and use them to add the sub-directories of SCRIPTS_PATH to sys.path, and to create a directory tree and path dictionary.
+All three use a single walk of the project directory.
 """
 
 # Import some functions from our utils_module:
@@ -117,14 +123,25 @@ print_header = utils_module.print_header
 get_directory_tree = utils_module.get_directory_tree 
 get_subdirectories = utils_module.get_subdirectories 
 
+# Walk the project directory once (skipping hidden/private directories such as __pycache__ and .ipynb_checkpoints).
+# The walk is cached in utils_module and reused by get_directory_tree below.
+project_walk = utils_module._cached_walk(PROJECT_PATH, ['__pycache__', '.ipynb_checkpoints'])
+
+# Add all sub-directories of SCRIPTS_PATH to sys.path
+scripts_prefix = os.path.join(str(SCRIPTS_PATH), '')
+for _, _, dir_path in project_walk:
+    if dir_path.startswith(scripts_prefix):
+        sys.path.append(dir_path)
+
 # Create and display our project directory tree
 print_header("Project directory structure")
-_, project_directory_tree_string = get_directory_tree(base_path=PROJECT_PATH,
-                                                      base_name='project')
+project_directory_tree, project_directory_tree_string = get_directory_tree(base_path=PROJECT_PATH,
+                                                                           base_name='project',
+                                                                           use_cached_walk=True)
 
-# Create a dictionary that maps names to paths for immediate subdirectories of the project directory
+# Create a dictionary that maps names to paths for immediate subdirectories of the project directory.
+# These are the top level of the tree we just built, so there is no need to walk the project directory again.
 print_header("Paths to first-level subdirectories conveniently stored in 'path' dictionary")
-path = get_subdirectories(base_path=PROJECT_PATH,
-                          depth=0,)
+path = {dir_name: subtree['path'] for dir_name, subtree in project_directory_tree['project']['subdirectories'].items()}
 for dir_name, dir_path in path.items():
     print(f"path[\'{dir_name}\'] = {dir_path}")
@@ -1,12 +1,24 @@
-from sympy import symbols, Poly, isprime, sympify
-from sympy.polys.domains import GF
-from itertools import product
-from typing import Optional, Union, List, Dict, Tuple
-from sympy.polys.domains.modularinteger import ModularInteger
-from sympy.polys.domains.finitefield import FiniteField
+from __future__ import annotations
+from typing import Optional, Union, List, Dict, Tuple, TYPE_CHECKING
 import random
+import numpy as np
 from utils import print_header, display_aligned
 import re
+from functools import lru_cache
+
+# SymPy takes a noticeable time to import, so it is imported inside the functions that use it, on first call.
+# These imports are only for type annotations.
+if TYPE_CHECKING:
+    from sympy import Poly
+    from sympy.polys.domains.modularinteger import ModularInteger
+    from sympy.polys.domains.finitefield import FiniteField
+
+# Variable names X_0, X_1, ... in a polynomial string
+_VAR_RE = re.compile(r'X_\d+')
+
+# Random number generator used by the verifier, separate from the module-level one in random
+_rng = random.Random()
+
 
 def sum_check_choose_poly() -> Union[None, Tuple[Dict[int, Poly], Dict[int, Union[int, ModularInteger]], Dict[int, Union[int, ModularInteger]], List[ModularInteger]]]:
     """
@@ -25,6 +37,8 @@ def sum_check_choose_poly() -> Union[None, Tuple[Dict[int, Poly], Dict[int, Unio
 
         Returns None if the input prime is invalid.
     """
+    from sympy import isprime
+
     # Prompt the user to input a prime number
     p = input("Enter a prime:")
     p = int(p)
@@ -32,9 +46,6 @@ def sum_check_choose_poly() -> Union[None, Tuple[Dict[int, Poly], Dict[int, Unio
         print("Invalid input: p must be prime. We'll modify the function to handle fields of prime-power order later.")
         return None
 
-    # Define the finite field GF(p)
-    F = GF(p)
-
     # Input polynomial as a string
     poly_str = input("Enter your polynomial (e.g. 2*X_0**2 + X_0*X_1*X_2 + X_1*X_4**3 + X_1 + X_3):")
 
@@ -45,15 +56,8 @@ def sum_check_choose_poly() -> Union[None, Tuple[Dict[int, Poly], Dict[int, Unio
     else:
         user_input = False
 
-    # Extract variable names from the polynomial string
-    variable_names = sorted(set(re.findall(r'X_\d+', poly_str)))
-    # Define symbols for variables
-    variables = symbols(variable_names)
-    variable_map = {name: var for name, var in zip(variable_names, variables)}
-    # Convert the string to a SymPy expression
-    poly_expr = sympify(poly_str, locals=variable_map)
-    # Define the polynomial over the finite field
-    g = Poly(poly_expr, variables, domain=F)
+    # Define the polynomial over the finite field GF(p)
+    g = _parse_poly(poly_str, p)
 
     # Call the sum-check protocol
     return sum_check_protocol(g=g, user_input=user_input)
@@ -78,20 +82,34 @@ def sum_check_protocol(
             - rand (List[ModularInteger]): List of random field elements used in the protocol.
 
         Returns None if the field is not of prime order.
+        If a check fails, the protocol stops there, and the dictionaries only cover the rounds run so far.
     """
+    from sympy import Poly, isprime
+
     X = g.gens  # Tuple of variables in the polynomial
     v = len(X)  # Number of variables
     F = g.domain  # The finite field GF(p)
+    p = F.mod  # Order of the field
+    X_str = [str(x) for x in X]  # Variable names, for display
 
-    if not isprime(F.mod):
+    if not isprime(p):
         print("F must be of prime order: we'll modify the function to handle fields of prime-power order later.")
         return None
 
+    # Table of coefficients of g: all hypercube sums and substitutions below are vectorized operations on this table
+    # mod p, rather than by repeated SymPy substitution over each point of the boolean hypercube
+    table = coefficient_table(g)
+    # Monomials of g, for evaluating g directly at a point (as V does with oracle access to g)
+    coeffs, exponents = monomials(g)
+
     # Compute H = sum of g evaluated over all boolean assignments
-    H = sum(g.eval({X[k]: b_k for k, b_k in enumerate(b)}) for b in product([0, 1], repeat=v))
+    H = int(sum_over_hypercube(table, p=p))
+    # Table of coefficients of g with the random field elements chosen so far substituted
+    partial = table
 
     # Initialize data structures
     rand: List[ModularInteger] = []  # List of random field elements
+    rand_ints: List[int] = []  # The same random field elements, as integers in [0, p)
     univariate: Dict[int, Poly] = {}  # Univariate polynomials at each round
     rand_eval: Dict[int, Union[int, ModularInteger]] = {}  # Evaluations at random points
     sum_check: Dict[int, Union[int, ModularInteger]] = {}  # Sum-check values at each round
@@ -102,8 +120,6 @@ def sum_check_protocol(
         if j == v:
             print_header(f"Final check")
 
-        if j == 0:
-            univariate[j] = g  # Initial polynomial
         if j > 0:
             # Generate random field element
             rfe = random_field_element(field=F, user_input=user_input)
@@ -112,36 +128,41 @@ def sum_check_protocol(
                 break
             # Append random field element to the list
             rand.append(rfe)
+            rand_ints.append(int(rfe) % p)
             # Evaluate previous univariate polynomial at the random point
-            rand_eval[j - 1] = univariate[j - 1].eval({X[j - 1]: rand[j - 1]}) % F.mod
-            # Substitute the first j random field elements into the polynomial
-            univariate[j] = g.subs({X[i]: rand[i] for i in range(j)})
+            rand_eval[j - 1] = int(fix_first_variable(univariate_coeffs, r=rand_ints[j - 1], p=p))
+            # Substitute the newest random field element into the table of coefficients, which already has the
+            # previous j - 1 random field elements substituted
+            partial = fix_first_variable(partial, r=rand_ints[j - 1], p=p)
 
         if j < v:
-            # Compute the univariate polynomial for the current round
-            univariate[j] = sum(
-                univariate[j].subs({X[k + j + 1]: b_k for k, b_k in enumerate(b)})
-                for b in product([0, 1], repeat=v - 1 - j)
-            )
-            # Compute the sum-check value
-            sum_check[j] = (univariate[j].eval({X[j]: 0}) + univariate[j].eval({X[j]: 1})) % F.mod
+            # Compute the univariate polynomial for the current round by summing over the remaining variables
+            univariate_coeffs = sum_over_hypercube(partial, p=p, keep=1)
+            univariate[j] = Poly([int(c) for c in univariate_coeffs[::-1]], X[j], domain=F)
+            # Compute the sum-check value g_j(0) + g_j(1) = 2 * a_0 + a_1 + ... + a_d directly from the coefficients
+            sum_check[j] = int((univariate_coeffs[0] + univariate_coeffs.sum()) % p)
         else:
-            # Final round: evaluate the last polynomial at the random point
-            rand_eval[j] = univariate[j - 1].eval({X[j - 1]: rand[j - 1]}) % F.mod
+            # Final round: the last polynomial evaluated at the random point, computed above
+            rand_eval[j] = rand_eval[j - 1]
             # Sum-check value from the oracle
-            sum_check[j] = g.subs({X[i]: r for i, r in enumerate(rand)}) % F.mod
+            sum_check[j] = evaluate(rand_ints, coeffs=coeffs, exponents=exponents, p=p)
+            # g with all random field elements substituted
+            univariate[j] = F.to_sympy(F(sum_check[j]))
 
         # Perform consistency checks
-        consistency_check(
+        check_passed = consistency_check(
             j=j,
             v=v,
-            X=X,
+            X_str=X_str,
             H=H,
-            rand=rand,
+            rand_ints=rand_ints,
             univariate=univariate,
             rand_eval=rand_eval,
             sum_check=sum_check
         )
+        # V rejects as soon as a check fails, so there is no point running the remaining rounds
+        if not check_passed:
+            break
 
     return univariate, rand_eval, sum_check, rand
 
@@ -149,48 +170,48 @@ def sum_check_protocol(
 def consistency_check(
     j: int,
     v: int,
-    X: Tuple[symbols],
+    X_str: List[str],
     H: int,
-    rand: List[ModularInteger],
+    rand_ints: List[int],
     univariate: Dict[int, Poly],
     rand_eval: Dict[int, Union[int, ModularInteger]],
     sum_check: Dict[int, Union[int, ModularInteger]]
-) -> None:
+) -> bool:
     """
     Performs the consistency checks for each round of the sum-check protocol.
 
     Args:
         j (int): The current round index.
         v (int): The total number of variables.
-        X (Tuple[symbols]): Tuple of variables in the polynomial.
+        X_str (List[str]): Names of the variables in the polynomial.
         H (int): The sum of the polynomial evaluated over all boolean assignments.
-        rand (List[ModularInteger]): List of random field elements chosen so far.
+        rand_ints (List[int]): List of random field elements chosen so far, as integers.
         univariate (Dict[int, Poly]): Univariate polynomials at each round.
         rand_eval (Dict[int, Union[int, ModularInteger]]): Evaluations at random points.
         sum_check (Dict[int, Union[int, ModularInteger]]): Sum-check values at each round.
 
     Returns:
-        None
+        True if the check passed, False if V rejects.
     """
     if j < v:
         # Prepare variable names for display
-        fix_rand = [str(int(r)) for r in rand[:j]]
+        fix_rand = [str(r) for r in rand_ints[:j]]
         bool_var = [f'b_{k}' for k in range(j + 1, v)]
-        poly_input = ', '.join(fix_rand + [str(X[j])] + bool_var)
+        poly_input = ', '.join(fix_rand + [X_str[j]] + bool_var)
 
     if j > 0:
         # Verifier sends a random field element to the prover
         print(
-            f"V sends {int(rand[j - 1])}, chosen uniformly at random from F, independently of any previous choices, to P."
+            f"V sends {rand_ints[j - 1]}, chosen uniformly at random from F, independently of any previous choices, to P."
         )
 
     if j < v:
         print(f"\nP sends the following univariate polynomial to V:\n")
 
     if j < v - 1:
-        equation_1 = f"\ng_{j}({X[j]}) = sum g({poly_input}) over {', '.join(bool_var)} in {{0,1}}^{len(bool_var)}"
+        equation_1 = f"\ng_{j}({X_str[j]}) = sum g({poly_input}) over {', '.join(bool_var)} in {{0,1}}^{len(bool_var)}"
     elif j == v - 1:
-        equation_1 = f"\ng_{j}({X[j]}) = g({poly_input})"
+        equation_1 = f"\ng_{j}({X_str[j]}) = g({poly_input})"
 
     if j < v:
         equation_2 = f"= {univariate[j].as_expr()}"
@@ -208,15 +229,15 @@ def consistency_check(
     elif 0 < j < v:
         # Verify that g_{j-1}(r_{j-1}) equals g_j(0) + g_j(1)
         print(
-            f"\nV compares two most recent polynomials by checking that g_{j - 1}({int(rand[j - 1])}) = g_{j}(0) + g_{j}(1):\n"
+            f"\nV compares two most recent polynomials by checking that g_{j - 1}({rand_ints[j - 1]}) = g_{j}(0) + g_{j}(1):\n"
         )
-        equation_1 = f"g_{j - 1}({int(rand[j - 1])}) = {rand_eval[j - 1]}"
+        equation_1 = f"g_{j - 1}({rand_ints[j - 1]}) = {rand_eval[j - 1]}"
         check_passed = rand_eval[j - 1] == sum_check[j]
     elif j == v:
         # Final check: verify that g_{v-1}(r_{v-1}) equals g evaluated at all random points
-        random_tuple = ', '.join([str(int(r)) for r in rand])
-        print(f"\nV checks that g_{j - 1}({int(rand[j - 1])}) = g({random_tuple}) (the RHS given P, assuming P committed to g at the outset, or an oracle):\n")
-        equation_1 = f"g_{j - 1}({int(rand[j - 1])}) = {rand_eval[j]}"
+        random_tuple = ', '.join([str(r) for r in rand_ints])
+        print(f"\nV checks that g_{j - 1}({rand_ints[j - 1]}) = g({random_tuple}) (the RHS given P, assuming P committed to g at the outset, or an oracle):\n")
+        equation_1 = f"g_{j - 1}({rand_ints[j - 1]}) = {rand_eval[j]}"
         equation_2 = f"g({random_tuple}) = {sum_check[j]}"
         display_aligned(equation_1, equation_2)
         check_passed = rand_eval[j] == sum_check[j]
@@ -233,9 +254,142 @@ def consistency_check(
     else:
         print("\nCHECK FAILED: REJECT")
 
+    return check_passed
+
 
 """ANCILLARY FUNCTIONS"""
 
+@lru_cache(maxsize=32)
+def _parse_poly(poly_str: str, p: int) -> Poly:
+    """
+    Converts a polynomial string in the variables X_0, X_1, ... to a polynomial over GF(p).
+
+    Results are cached on (poly_str, p), so entering the same polynomial again (e.g. when re-running
+    sum_check_choose_poly in a notebook) skips parsing. Poly objects are immutable, so sharing them is safe.
+
+    Args:
+        poly_str (str): The polynomial, e.g. '2*X_0**2 + X_0*X_1*X_2 + X_1*X_4**3 + X_1 + X_3'.
+        p (int): The order of the field.
+
+    Returns:
+        The polynomial over GF(p).
+    """
+    from sympy import symbols, Poly, sympify
+    from sympy.polys.domains import GF
+
+    # Extract variable names from the polynomial string
+    variable_names = sorted(set(_VAR_RE.findall(poly_str)))
+    # Define symbols for variables
+    variables = symbols(variable_names)
+    variable_map = {name: var for name, var in zip(variable_names, variables)}
+    # Convert the string to a SymPy expression
+    poly_expr = sympify(poly_str, locals=variable_map)
+    # Define the polynomial over the finite field
+    return Poly(poly_expr, variables, domain=GF(p))
+
+
+def coefficient_table(g: Poly) -> np.ndarray:
+    """
+    Flattens a polynomial over GF(p) into a dense table of its coefficients.
+
+    Entries are integers in [0, p). The table has dtype int64 when no contraction below can overflow 64 bits,
+    and dtype object (arbitrary-precision Python ints) otherwise, i.e. for very large p.
+
+    Args:
+        g (Poly): The polynomial over GF(p).
+
+    Returns:
+        An array with one axis per variable X_i, of length deg_i(g) + 1, whose entry at (e_0, ..., e_{v-1})
+        is the coefficient of X_0**e_0 * ... * X_{v-1}**e_{v-1} in g.
+    """
+    p = g.domain.mod
+    shape = tuple(max(d, 0) + 1 for d in g.degree_list())
+    dtype = np.int64 if max(shape) * (p - 1) ** 2 < 2 ** 63 else object
+    table = np.zeros(shape, dtype=dtype)
+    for monom, coeff in g.terms():
+        table[monom] = int(coeff) % p
+    return table
+
+
+def monomials(g: Poly) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Flattens a polynomial over GF(p) into its list of monomials, stored as an array of coefficients and
+    an array of exponents.
+
+    Args:
+        g (Poly): The polynomial over GF(p).
+
+    Returns:
+        A tuple containing:
+            - coeffs (np.ndarray): The coefficients of the monomials of g, as integers in [0, p).
+            - exponents (np.ndarray): A 2D array whose k-th row is the exponent tuple of the k-th monomial.
+    """
+    p = g.domain.mod
+    terms = g.terms()
+    dtype = np.int64 if len(terms) * (p - 1) ** 2 < 2 ** 63 else object
+    coeffs = np.array([int(coeff) % p for _, coeff in terms], dtype=dtype)
+    exponents = np.array([monom for monom, _ in terms], dtype=np.int64).reshape(len(terms), len(g.gens))
+    return coeffs, exponents
+
+
+def evaluate(point: List[int], coeffs: np.ndarray, exponents: np.ndarray, p: int) -> int:
+    """
+    Evaluates a polynomial given by its monomials at a point, with integer arithmetic mod p.
+
+    Args:
+        point (List[int]): The value of each variable, as an integer.
+        coeffs (np.ndarray): Coefficients of the monomials, as returned by monomials.
+        exponents (np.ndarray): Exponents of the monomials, as returned by monomials.
+        p (int): The order of the field.
+
+    Returns:
+        The value of the polynomial at the point, as an integer in [0, p).
+    """
+    values = coeffs
+    for i, x in enumerate(point):
+        # Look up x**e mod p for every exponent e of the i-th variable at once
+        powers = np.array([pow(x, e, p) for e in range(int(exponents[:, i].max()) + 1)], dtype=coeffs.dtype)
+        values = values * powers[exponents[:, i]] % p
+    return int(values.sum() % p)
+
+
+def fix_first_variable(table: np.ndarray, r: int, p: int) -> np.ndarray:
+    """
+    Substitutes a field element for the first variable of a polynomial given by its table of coefficients,
+    i.e. contracts the first axis of the table against (1, r, r**2, ...).
+
+    Args:
+        table (np.ndarray): Table of coefficients, as returned by coefficient_table.
+        r (int): The value substituted for the first variable.
+        p (int): The order of the field.
+
+    Returns:
+        The table of coefficients of the resulting polynomial in the remaining variables.
+    """
+    powers = np.array([pow(r, e, p) for e in range(table.shape[0])], dtype=table.dtype)
+    return np.tensordot(powers, table, axes=1) % p
+
+
+def sum_over_hypercube(table: np.ndarray, p: int, keep: int = 0) -> np.ndarray:
+    """
+    Sums a polynomial given by its table of coefficients over {0,1} in each variable except the first keep variables.
+
+    Since b**e summed over b in {0,1} is 2 for e = 0 and 1 for e > 0, summing over a variable amounts to adding
+    the sum along its axis to the slice at exponent 0, so no point of the hypercube is visited explicitly.
+
+    Args:
+        table (np.ndarray): Table of coefficients, as returned by coefficient_table.
+        p (int): The order of the field.
+        keep (int): The number of leading variables that are not summed over.
+
+    Returns:
+        The table of coefficients of the resulting polynomial in the first keep variables.
+    """
+    for axis in range(table.ndim - 1, keep - 1, -1):
+        table = (table.sum(axis=axis) + table.take(0, axis=axis)) % p
+    return table
+
+
 def random_field_element(
     field: FiniteField,
     user_input: bool = False,
@@ -259,7 +413,7 @@ def random_field_element(
         else:
             return None
     # Generate a random integer between 0 and p - 1
-    return field(random.randint(0, field.mod - 1))
+    return field(_rng.randrange(field.mod))
 
 
 def input_random_field_element(max_attempts: Optional[int] = None) -> Optional[int]:
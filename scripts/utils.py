@@ -1,59 +1,128 @@
 import os
 from pathlib import Path
-from typing import List, Dict, Any, Tuple, Union
+from typing import List, Dict, Any, Tuple, Union, Iterator, TYPE_CHECKING
 import inspect
-import pandas as pd
-import matplotlib.pyplot as plt
+import sys
+import importlib
+import weakref
+from functools import lru_cache
 
-try:
-    from IPython import get_ipython
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+def _lazy(name: str):
+    """
+    Returns the module called name, importing it only on first use.
+    Heavy dependencies such as matplotlib are resolved this way so that importing utils stays cheap.
+    """
+    module = sys.modules.get(name)
+    return module if module is not None else importlib.import_module(name)
 
-    if get_ipython():
-        from IPython.display import HTML
-        import ipywidgets as widgets
-    else:
-        widgets = None
 
+@lru_cache(maxsize=None)
+def _get_ipy() -> Dict[str, Any]:
+    """
+    Imports the IPython display hooks on first use and caches them.
+
+    Returns:
+        Dict[str, Any]: Maps 'display', 'clear_output' and 'HTML' to the IPython.display functions, and 'widgets'
+        to the ipywidgets module if running inside IPython. Empty if IPython is not installed.
+    """
+    try:
+        from IPython import get_ipython
+        from IPython.display import HTML, display, clear_output
+    except ImportError:
+        return {}
 
-        def HTML(*args, **kwargs):
-            print("HTML display is not available.")
-except ImportError:
-    widgets = None
+    ipy = {'display': display, 'clear_output': clear_output, 'HTML': HTML}
+    if get_ipython():
+        try:
+            import ipywidgets
+            ipy['widgets'] = ipywidgets
+        except ImportError:
+            pass
+    return ipy
 
 
-    def HTML(*args, **kwargs):
-        print("HTML display is not available.")
+def _html_unavailable(*args, **kwargs):
+    print("HTML display is not available.")
 
 
 def set_widgets(enable: bool = True, disable: bool = False) -> None:
     global widgets
     global HTML
     if enable:
-        try:
-            from IPython import get_ipython
-            if get_ipython():
-                from IPython.display import HTML
-                import ipywidgets as widgets
-            else:
-                widgets = None
-
-                def HTML(*args, **kwargs):
-                    print("HTML display is not available.")
-        except ImportError:
+        ipy = _get_ipy()
+        if 'widgets' in ipy:
+            HTML = ipy['HTML']
+            widgets = ipy['widgets']
+        else:
             widgets = None
-
-            def HTML(*args, **kwargs):
-                print("HTML display is not available.")
+            HTML = _html_unavailable
     if disable:
         widgets = None
+        HTML = _html_unavailable
+
+
+def __getattr__(name: str):
+    # widgets and HTML are only resolved (and IPython only imported) when first accessed
+    if name in {'widgets', 'HTML'}:
+        set_widgets()
+        return globals()[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-        def HTML(*args, **kwargs):
-            print("HTML display is not available.")
+
+# Walks cached by _cached_walk, keyed by (base path, ignored names)
+_walk_cache: Dict[Tuple[str, Tuple[str, ...]], List[Tuple[int, str, str]]] = {}
+
+
+def _walk_dirs(base_path: Union[str, Path],
+               ignore: List[str],
+               max_depth: Union[int, None] = None) -> Iterator[Tuple[int, str, str]]:
+    """
+    Walks the subdirectories of a directory with os.scandir, skipping hidden/private and ignored directories.
+
+    DirEntry.is_dir() uses the file type cached by os.scandir, and names are filtered as plain strings,
+    so no Path objects are created and no extra stat calls are made.
+
+    Args:
+        base_path (Union[str, Path]): The directory to walk.
+        ignore (List[str]): Directory names to skip, along with anything they contain.
+        max_depth (Union[int, None], optional): Do not descend below this depth. Defaults to None (no limit).
+
+    Yields:
+        Tuple[int, str, str]: (depth, name, path) for each directory, depth-first with each directory before its
+        own subdirectories. Immediate subdirectories of base_path have depth 0.
+    """
+    def walk(path: str, depth: int) -> Iterator[Tuple[int, str, str]]:
+        # Finish reading each directory before descending, so only one directory handle is open at a time
+        with os.scandir(path) as entries:
+            subdirs = [(entry.name, entry.path) for entry in entries
+                       if entry.name[0] not in {'.', '_'} and entry.name not in ignore and entry.is_dir(follow_symlinks=False)]
+        for name, subdir_path in subdirs:
+            yield depth, name, subdir_path
+            if max_depth is None or depth < max_depth:
+                yield from walk(subdir_path, depth + 1)
+
+    return walk(str(base_path), 0)
+
+
+def _cached_walk(base_path: Union[str, Path], ignore: List[str]) -> List[Tuple[int, str, str]]:
+    """
+    Returns the full result of _walk_dirs, walking the file system only the first time it is called for base_path and
+    ignore. Lets setup.py add script directories to sys.path and build the project directory tree from a single walk.
+    """
+    key = (str(base_path), tuple(ignore))
+    if key not in _walk_cache:
+        _walk_cache[key] = list(_walk_dirs(base_path, ignore))
+    return _walk_cache[key]
 
 
 def get_subdirectories(base_path: Path,
                        depth: int = 0,
-                       ignore: List[str] = None) -> dict:
+                       ignore: List[str] = None,
+                       use_cached_walk: bool = False) -> dict:
     """
     Creates a dictionary with keys as the immediate subdirectories of a specified directory
     and values as Path objects pointing to those directories, ignoring specified subdirectories,
@@ -63,6 +132,7 @@ def get_subdirectories(base_path: Path,
         base_path (Path): The path to the base directory.
         depth (int, optional): The depth of subdirectories to include. Defaults to 0.
         ignore (List[str], optional): A list of subdirectory names to ignore. Defaults to None.
+        use_cached_walk (bool, optional): If True, reuse an earlier walk of base_path, if any. Defaults to False.
 
     Returns:
         dict: A dictionary with subdirectory names as keys and Path objects as values.
@@ -73,28 +143,19 @@ def get_subdirectories(base_path: Path,
     if ignore is None:
         ignore = ['__pycache__', '.ipynb_checkpoints']
 
-    def get_subdirs_at_depth(current_path: Path, current_depth: int) -> dict:
-        if current_depth == depth:
-            return {
-                subdir.name: subdir
-                for subdir in current_path.iterdir()
-                if subdir.is_dir() and subdir.name[0] not in {'.', '_'} and subdir.name not in ignore
-            }
-
-        subdirs = {}
-        for subdir in current_path.iterdir():
-            if subdir.is_dir() and subdir.name[0] not in {'.', '_'} and subdir.name not in ignore:
-                deeper_subdirs = get_subdirs_at_depth(subdir, current_depth + 1)
-                subdirs.update(deeper_subdirs)
-        return subdirs
+    if use_cached_walk:
+        walk = _cached_walk(base_path, ignore)
+    else:
+        walk = _walk_dirs(base_path, ignore, max_depth=depth)
 
-    return get_subdirs_at_depth(base_path, 0)
+    return {name: Path(dir_path) for dir_depth, name, dir_path in walk if dir_depth == depth}
 
 
 def get_directory_tree(base_path: Path,
                        base_name: str,
                        print_paths: bool = True,
-                       ignore: List[str] = None) -> Tuple[Dict[str, Any], str]:
+                       ignore: List[str] = None,
+                       use_cached_walk: bool = False) -> Tuple[Dict[str, Any], str]:
     """
     Prints a directory tree and creates dictionaries mapping directory names to path objects.
 
@@ -103,6 +164,7 @@ def get_directory_tree(base_path: Path,
         base_name (str): The name to use for the base path in the returned dictionary.
         print_paths (bool): If True, print the paths.
         ignore (List[str]): List of directory names to ignore.
+        use_cached_walk (bool): If True, reuse an earlier walk of base_path, if any.
 
     Returns:
         Tuple[Dict[str, Any], str]: A tuple containing the nested dictionary structure representing the directory tree and the string representation of the tree.
@@ -110,33 +172,40 @@ def get_directory_tree(base_path: Path,
     if ignore is None:
         ignore = ['__pycache__', '.ipynb_checkpoints']
 
-    def create_path_dict(path: Path) -> Dict[str, Any]:
-        """
-        Recursively creates a nested dictionary of paths starting from the given path, including only directories.
-        """
-        path_dict = {}
-        for item in path.iterdir():
-            if item.is_dir() and item.name[0] not in {'.', '_'} and item.name not in ignore:
-                subdirectory = create_path_dict(item)
-                path_dict[item.name] = {"path": item, "subdirectories": subdirectory}
-        return path_dict
+    if use_cached_walk:
+        walk = _cached_walk(base_path, ignore)
+    else:
+        walk = _walk_dirs(base_path, ignore)
+
+    # Rebuild the nested dictionary of paths from the walk: levels[d] holds the subdirectories of the directory most
+    # recently seen at depth d - 1, so each directory is added to the level of its parent
+    path_dict = {}
+    levels = [path_dict]
+    for depth, name, dir_path in walk:
+        del levels[depth + 1:]
+        subdirectories = {}
+        levels[depth][name] = {"path": Path(dir_path), "subdirectories": subdirectories}
+        levels.append(subdirectories)
 
     # Start with the base path
-    path_structure = {base_name: {"path": base_path, "subdirectories": create_path_dict(base_path)}}
+    path_structure = {base_name: {"path": base_path, "subdirectories": path_dict}}
 
-    def print_path_dict(d: Dict[str, Any], prefix: str = "", output: str = "") -> str:
+    def print_path_dict(d: Dict[str, Any], prefix: str = "", output: List[str] = None) -> List[str]:
         """
-        Recursively prints the nested dictionary of paths in a tree format and accumulates the output in a string.
+        Recursively prints the nested dictionary of paths in a tree format and accumulates the output lines in a list,
+        to be joined once at the end (rather than growing a string line by line).
         """
+        if output is None:
+            output = []
         for key, value in d.items():
             if isinstance(value, dict):
-                output += prefix + "├─ " + key + "/\n"
-                output = print_path_dict(value["subdirectories"], prefix + "│  ", output)
+                output.append(prefix + "├─ " + key + "/\n")
+                print_path_dict(value["subdirectories"], prefix + "│  ", output)
             else:
-                output += prefix + "└─ " + key + ": " + str(value['path']) + "\n"
+                output.append(prefix + "└─ " + key + ": " + str(value['path']) + "\n")
         return output
 
-    tree_output = print_path_dict(path_structure[base_name]['subdirectories'])
+    tree_output = ''.join(print_path_dict(path_structure[base_name]['subdirectories']))
 
     if print_paths:
         print(tree_output)
@@ -146,13 +215,8 @@ def get_directory_tree(base_path: Path,
 
 # USEFUL FUNCTIONS
 
-try:
-    from IPython.display import display as ipy_display
-except ImportError:
-    ipy_display = None
-
-
 def display(*args):
+    ipy_display = _get_ipy().get('display')
     if ipy_display is not None:
         for arg in args:
             if arg is not None:
@@ -162,17 +226,9 @@ def display(*args):
             if arg is not None:
                 print(arg)
 
-try:
-    from IPython.display import clear_output as ipy_clear_output
-except ImportError:
-    ipy_clear_output = None
-try:
-    from IPython.display import clear_output as ipy_clear_output
-except ImportError:
-    ipy_clear_output = None
-
 
 def clear_output():
+    ipy_clear_output = _get_ipy().get('clear_output')
     if ipy_clear_output is not None:
         ipy_clear_output(wait=True)
     else:
@@ -184,15 +240,41 @@ def clear_output():
             os.system("clear")
 
 
+# Names registered with name_variable, keyed by id() of the object. Each entry is removed when its object is
+# garbage collected, so a recycled id() never maps to a stale name.
+_variable_names: Dict[int, str] = {}
+
+
+def name_variable(var: Any, name: str) -> Any:
+    """
+    Registers a name for an object, so that get_variable_name can return it without inspecting any frames.
+
+    Args:
+        var (Any): The object to name. Must support weak references (e.g. DataFrames, Paths, user-defined objects).
+        name (str): The name to register.
+
+    Returns:
+        Any: var itself, so that the call can wrap an assignment, e.g. df = name_variable(pd.DataFrame(...), 'df').
+    """
+    key = id(var)
+    weakref.finalize(var, _variable_names.pop, key, None)
+    _variable_names[key] = name
+    return var
+
+
 def get_variable_name(var):
-    # Get the name of the variable using the inspect module
+    # Use the name registered with name_variable, if any: a single dictionary lookup
+    name = _variable_names.get(id(var))
+    if name is not None:
+        return name
+    # Otherwise fall back to searching the caller's local variables using the inspect module
     for name, value in inspect.currentframe().f_back.f_locals.items():
         if value is var:
             return name
     return None  # Variable name not found
 
 
-def save_df(df: pd.DataFrame,
+def save_df(df: 'pd.DataFrame',
             save_as: Union[str, Path],
             tack_on: Union[str, None] = None,
             index: bool=False,) -> None:
@@ -217,6 +299,7 @@ def save_df(df: pd.DataFrame,
     elif file_extension == '.json':
         df.to_json(save_as, orient='records')
     elif file_extension == '.png':
+        plt = _lazy('matplotlib.pyplot')
         plt.axis('off')  # Turn off the axis
         plt.table(cellText=df.values, colLabels=df.columns, loc='center')  # Display DataFrame as a table
         plt.savefig(save_as)  # Save as PNG